@@ -0,0 +1,232 @@
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from document_processor import process_document_stream, segment_text_stream
+from translation_batcher import QueueFullError
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+SUPPORTED_EXTENSIONS = ('pdf', 'docx', 'txt')
+
+class TranslateRequest(BaseModel):
+    text: str = Field(min_length=1)
+    timeout: Optional[float] = Field(default=None, gt=0)
+
+class BatchTranslateRequest(BaseModel):
+    texts: List[str] = Field(min_length=1)
+    timeout: Optional[float] = Field(default=None, gt=0)
+
+def remove_upload(file_path):
+    """Delete a spooled upload, ignoring files that are already gone"""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+def create_api(batcher, request_timeout=60.0, document_timeout=3600.0, max_batch_texts=256,
+               max_text_chars=5000, max_in_flight=256):
+    """Create the JSON translation API backed by a shared TranslationBatcher
+
+    Every endpoint submits segments to the same batcher as the Gradio UI, so
+    concurrent API and UI requests share model batches and the cache.
+    """
+    api = FastAPI(title="English to Arabic Translator API")
+
+    def resolve_timeout(timeout, limit=request_timeout):
+        # Clients may shorten the per-request timeout but never extend it
+        return min(timeout, limit) if timeout else limit
+
+    def check_text_lengths(texts):
+        # Oversized texts would be tokenized in full on the batcher thread
+        for text in texts:
+            if len(text) > max_text_chars:
+                raise HTTPException(status_code=413, detail=f"Texts are limited to {max_text_chars} characters")
+
+    async def translate_many(texts, timeout):
+        futures = []
+        try:
+            for text in texts:
+                futures.append(batcher.submit(text, block=False))
+            return await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), timeout)
+        except QueueFullError:
+            abandon(texts[:len(futures)], futures)
+            raise HTTPException(status_code=503, detail="Translation queue is full, try again later")
+        except asyncio.TimeoutError:
+            # Drop texts nobody else waits for so they never reach the model
+            abandon(texts, futures)
+            raise HTTPException(status_code=504, detail=f"Translation timed out after {timeout:g}s")
+
+    def abandon(texts, futures):
+        # futures are the batcher's concurrent futures; their asyncio wrappers
+        # are cancelled by the timeout and would always look done
+        for text, future in zip(texts, futures):
+            if not future.done():
+                batcher.abandon(text)
+
+    @api.post("/api/translate")
+    async def translate(request: TranslateRequest):
+        """Translate a single text"""
+        check_text_lengths([request.text])
+        [result] = await translate_many([request.text], resolve_timeout(request.timeout))
+        if result.startswith("Error:"):
+            raise HTTPException(status_code=500, detail=result)
+        return {"translation": result}
+
+    @api.post("/api/translate/batch")
+    async def translate_batch(request: BatchTranslateRequest):
+        """Translate a list of texts, reporting failed items by index"""
+        if len(request.texts) > max_batch_texts:
+            raise HTTPException(status_code=413, detail=f"At most {max_batch_texts} texts per request")
+        check_text_lengths(request.texts)
+        results = await translate_many(request.texts, resolve_timeout(request.timeout))
+        failed = [i for i, result in enumerate(results) if result.startswith("Error:")]
+        return {"translations": results, "failed": failed}
+
+    @api.post("/api/translate/document")
+    async def translate_document(file: UploadFile = File(...), timeout: Optional[float] = Query(None, gt=0)):
+        """Translate an uploaded document, streaming segments as NDJSON
+
+        Emits one JSON object per line: "table" events for translated DOCX
+        tables, "segment" events in document order, then a final "done" event,
+        or an "error" event if the request times out or extraction fails.
+        """
+        extension = (file.filename or "").lower().split('.')[-1]
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file format: {extension}")
+
+        # Spool the upload to disk off the event loop so extraction can stream from it
+        file_path = await asyncio.to_thread(spool_upload, file.file, extension)
+
+        # The background task also runs if the client disconnects before the
+        # stream starts, when the generator's own cleanup never executes
+        return StreamingResponse(
+            stream_document(file_path, resolve_timeout(timeout, document_timeout)),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(remove_upload, file_path)
+        )
+
+    def spool_upload(source, extension):
+        with tempfile.NamedTemporaryFile(suffix=f'.{extension}', delete=False) as temp_file:
+            shutil.copyfileobj(source, temp_file, 1024 * 1024)
+        return temp_file.name
+
+    async def stream_document(file_path, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        def event(**payload):
+            return json.dumps(payload, ensure_ascii=False) + "\n"
+
+        def remaining():
+            left = deadline - loop.time()
+            if left <= 0:
+                raise asyncio.TimeoutError
+            return left
+
+        pending = deque()
+        # Set when the stream ends so table translation in a worker thread
+        # stops sending cells to the model
+        cancelled = threading.Event()
+
+        def translate_cell(text):
+            if cancelled.is_set():
+                raise TimeoutError("Document request cancelled")
+            future = batcher.submit(text)
+            while True:
+                try:
+                    return future.result(timeout=0.1)
+                except FutureTimeoutError:
+                    if cancelled.is_set():
+                        batcher.abandon(text)
+                        raise TimeoutError("Document request cancelled")
+
+        async def resubmit(segment):
+            # Wait for room in the batcher queue until the deadline
+            while True:
+                try:
+                    return batcher.submit(segment, block=False)
+                except QueueFullError:
+                    await asyncio.sleep(min(0.05, remaining()))
+
+        try:
+            chunks, element_processor = await asyncio.wait_for(
+                asyncio.to_thread(process_document_stream, file_path), remaining())
+            if chunks is None:
+                yield event(type="error", error="Failed to extract text from document.")
+                return
+
+            if element_processor:
+                for table_id in element_processor.tables:
+                    await asyncio.wait_for(asyncio.to_thread(
+                        element_processor.translate_table_cells, table_id, translate_cell), remaining())
+                    table = element_processor.tables[table_id]
+                    yield event(type="table", id=table_id, status=table['status'],
+                                data=table.get('translated_data', table.get('data')))
+
+            # Translate in document order with a bounded window of in-flight segments
+            index = 0
+            failed = []
+
+            async def collect():
+                while True:
+                    seg_index, segment, placeholders, future = pending[0]
+                    try:
+                        result = await asyncio.wait_for(asyncio.wrap_future(future), remaining())
+                        break
+                    except QueueFullError:
+                        # We joined another caller's future whose queue put
+                        # failed; resubmit the segment rather than give up
+                        pending[0] = (seg_index, segment, placeholders, await resubmit(segment))
+                pending.popleft()
+                if result.startswith("Error:"):
+                    failed.append(seg_index + 1)
+                return event(type="segment", index=seg_index, text=result, placeholders=placeholders,
+                             failed=result.startswith("Error:"))
+
+            segmented = segment_text_stream(chunks)
+            while True:
+                segmented_chunk = await asyncio.wait_for(
+                    asyncio.to_thread(next, segmented, None), remaining())
+                if segmented_chunk is None:
+                    break
+                segments, segment_placeholders = segmented_chunk
+                for seg_idx, segment in enumerate(segments):
+                    while True:
+                        try:
+                            future = batcher.submit(segment, block=False)
+                            break
+                        except QueueFullError:
+                            # Wait for our own segments to drain before retrying
+                            if not pending:
+                                future = await resubmit(segment)
+                                break
+                            yield await collect()
+                    pending.append((index, segment, segment_placeholders.get(seg_idx, []), future))
+                    index += 1
+                    if len(pending) >= max_in_flight:
+                        yield await collect()
+            while pending:
+                yield await collect()
+
+            yield event(type="done", segments=index, failed=failed)
+
+        except asyncio.TimeoutError:
+            yield event(type="error", error=f"Translation timed out after {timeout:g}s")
+        except Exception as e:
+            yield event(type="error", error=f"Document processing error: {str(e)}")
+        finally:
+            # Don't hand the rest of a timed-out or disconnected window to the model
+            cancelled.set()
+            abandon([segment for _, segment, _, _ in pending], [future for _, _, _, future in pending])
+            remove_upload(file_path)
+
+    return api
@@ -1,8 +1,13 @@
 import gradio as gr
 from transformers import MarianMTModel, MarianTokenizer
 from concurrent.futures import ThreadPoolExecutor
-from document_processor import process_document, segment_text
+from document_processor import process_document, process_document_stream, segment_text, segment_text_stream
 from document_output import create_txt_file, create_docx_file, create_pdf_file
+from segment_store import SegmentStore
+from translation_batcher import TranslationBatcher
+from api import create_api
+from collections import deque
+import os
 import time
 import tempfile
 import torch
@@ -15,17 +20,57 @@ if device == "cuda":
     print(f"GPU: {torch.cuda.get_device_name(0)}")
     print(f"Available GPUs: {torch.cuda.device_count()}")
 
+# Large-document mode: inputs above the threshold are segmented and translated
+# through an on-disk SegmentStore, keeping document data under the ceiling
+LARGE_DOCUMENT_THRESHOLD_MB = float(os.environ.get("LARGE_DOCUMENT_THRESHOLD_MB", "20"))
+LARGE_DOCUMENT_MEMORY_MB = float(os.environ.get("LARGE_DOCUMENT_MEMORY_MB", "256"))
+PREVIEW_CHARS = int(os.environ.get("PREVIEW_CHARS", "5000"))
+TRANSLATION_WORKERS = 64
+SEGMENT_MAX_CHARS = 400
+
+# Concurrent translate_segment calls (UI threads and API requests) are
+# grouped into model batches and cached by TranslationBatcher
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "10"))
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_QUEUE_SIZE = int(os.environ.get("TRANSLATION_QUEUE_SIZE", "1024"))
+API_REQUEST_TIMEOUT = float(os.environ.get("API_REQUEST_TIMEOUT", "60"))
+API_DOCUMENT_TIMEOUT = float(os.environ.get("API_DOCUMENT_TIMEOUT", "3600"))
+API_MAX_TEXT_CHARS = int(os.environ.get("API_MAX_TEXT_CHARS", "5000"))
+
 tokenizer = MarianTokenizer.from_pretrained(model_name)
 model = MarianMTModel.from_pretrained(model_name).to(device)
 
+def translate_batch(texts):
+    """Translate a batch of text segments in a single model call"""
+    try:
+        inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+        with torch.no_grad():
+            translated = model.generate(**inputs)
+        return tokenizer.batch_decode(translated, skip_special_tokens=True)
+    except Exception as e:
+        if len(texts) == 1:
+            return [f"Error: {str(e)}"]
+        # Texts in a batch come from unrelated callers, so retry each half
+        # rather than failing every text for one bad input or an OOM
+        if device == "cuda":
+            torch.cuda.empty_cache()
+        middle = len(texts) // 2
+        return translate_batch(texts[:middle]) + translate_batch(texts[middle:])
+
+batcher = TranslationBatcher(
+    translate_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    cache_size=TRANSLATION_CACHE_SIZE,
+    max_queue_size=TRANSLATION_QUEUE_SIZE
+)
+
 def translate_segment(text):
     """Translate a single text segment"""
     try:
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        translated = model.generate(**inputs)
-        result = tokenizer.decode(translated[0], skip_special_tokens=True)
-        return result
+        return batcher.translate(text)
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -36,12 +81,167 @@ def translate_text(message, history):
     except Exception as e:
         return f"Translation error: {str(e)}"
 
-def translate_document(file, output_format, progress=gr.Progress()):
+def translate_elements(element_processor):
+    """Translate tables in a DOCX element processor, returning an error message on failure"""
+    # Translate tables if present
+    table_errors = []
+    for table_id in element_processor.tables:
+        success = element_processor.translate_table_cells(table_id, translate_segment)
+        if not success:
+            table_errors.append(table_id)
+    
+    # Check for element processing errors
+    summary = element_processor.get_processing_summary()
+    if summary['errors']:
+        error_details = "\n".join([f"⚠️ {error}" for error in summary['errors']])
+        if table_errors:
+            return f"Element processing failed:\n{error_details}"
+    return None
+
+def write_output_file(translated_text, output_format, element_processor):
+    """Write translated text (a string or iterable of chunks) in the requested format"""
+    if output_format == "DOCX" and element_processor:
+        # Enhanced DOCX with tables/figures
+        temp_file = tempfile.NamedTemporaryFile(suffix='.docx', delete=False)
+        success = element_processor.reconstruct_docx(translated_text, temp_file.name)
+        if not success:
+            # Fallback to simple DOCX
+            return create_docx_file(translated_text)
+        return temp_file.name
+    elif output_format == "TXT":
+        return create_txt_file(translated_text)
+    elif output_format == "DOCX":
+        return create_docx_file(translated_text)
+    elif output_format == "PDF":
+        return create_pdf_file(translated_text)
+    else:
+        return create_txt_file(translated_text)
+
+def element_summary(element_processor):
+    """Format the table/figure summary appended to the success message"""
+    if not element_processor:
+        return ""
+    
+    summary = element_processor.get_processing_summary()
+    if summary['tables']['total'] == 0 and summary['figures']['total'] == 0:
+        return ""
+    
+    msg = f"\n\n📄 Elements processed:"
+    msg += f"\n• Tables: {summary['tables']['successful']}/{summary['tables']['total']}"
+    msg += f"\n• Figures: {summary['figures']['successful']}/{summary['figures']['total']}"
+    
+    if summary['errors']:
+        msg += f"\n\n⚠️ Warnings:\n" + "\n".join([f"• {error}" for error in summary['errors']])
+    return msg
+
+def is_large_document(file):
+    """Check whether the uploaded file exceeds the large-document threshold"""
+    file_path = file.name if hasattr(file, 'name') else file
+    try:
+        return os.path.getsize(file_path) >= LARGE_DOCUMENT_THRESHOLD_MB * 1024 * 1024
+    except OSError:
+        return False
+
+def translate_large_document(file, output_format, progress):
+    """Translate a document through an on-disk segment store with bounded memory"""
+    budget = int(LARGE_DOCUMENT_MEMORY_MB * 1024 * 1024)
+    # Half the byte budget goes to segmentation. A Python str takes up to 4
+    # bytes per char, and while a chunk is segmented about five copies of it
+    # are alive (the reader's block, carry + chunk, the sentence list, the
+    # placeholder-free sentences and the packed segments), plus per-object
+    # overhead for each sentence, so budget ~24 bytes per chunk char. The
+    # sentence carried between chunks is capped separately.
+    segmentation_chars = budget // 2 // 24
+    carry_chars = min(segmentation_chars // 4, SEGMENT_MAX_CHARS * 100)
+    chunk_chars = max(SEGMENT_MAX_CHARS * 4, segmentation_chars - carry_chars)
+    # The other half covers in-flight segments: source plus translation at
+    # up to 4 bytes per char each
+    max_in_flight = max(TRANSLATION_WORKERS, budget // 2 // (SEGMENT_MAX_CHARS * 8))
+    
+    progress(0, desc="Extracting text and elements...")
+    chunks, element_processor = process_document_stream(file, chunk_chars=chunk_chars)
+    
+    if chunks is None:
+        return "Failed to extract text from document.", None
+    
+    if element_processor:
+        progress(0.1, desc="Processing tables and figures...")
+        error_msg = translate_elements(element_processor)
+        if error_msg:
+            return error_msg, None
+    
+    with SegmentStore() as store:
+        progress(0.2, desc="Segmenting text...")
+        for segments, segment_placeholders in segment_text_stream(
+                chunks, max_chars=SEGMENT_MAX_CHARS, max_carry_chars=carry_chars):
+            for seg_idx, segment in enumerate(segments):
+                store.append_segment(segment, segment_placeholders.get(seg_idx, []))
+        
+        total_segments = store.segment_count
+        if total_segments == 0:
+            return "No text found in document.", None
+        
+        progress(0.3, desc=f"Translating {total_segments} segments...")
+        
+        def collect(pending):
+            index, placeholders, future = pending.popleft()
+            try:
+                result = future.result()
+                failed = result.startswith("Error:")
+            except Exception:
+                failed = True
+            if failed:
+                store.append_translation(index, f"[TRANSLATION FAILED: Segment {index + 1}]",
+                                         placeholders, failed=True)
+            else:
+                store.append_translation(index, result, placeholders)
+            progress(0.3 + (store.translation_count / total_segments) * 0.5,
+                   desc=f"Translated {store.translation_count}/{total_segments} segments")
+        
+        # Keep a bounded window of in-flight segments, collected in order
+        with ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS) as executor:
+            pending = deque()
+            for index, segment, placeholders in store.iter_segments():
+                pending.append((index, placeholders, executor.submit(translate_segment, segment)))
+                if len(pending) >= max_in_flight:
+                    collect(pending)
+            while pending:
+                collect(pending)
+        
+        if store.failed_segments:
+            failed = store.failed_segments
+            listed = ', '.join(map(str, failed[:50]))
+            if len(failed) > 50:
+                listed += f", ... ({len(failed)} total)"
+            return (f"Translation completed with errors in segments: {listed}\n\n"
+                    f"{store.preview(PREVIEW_CHARS)}"), None
+        
+        progress(0.85, desc="Creating download file...")
+        # Pass the store itself so a DOCX fallback can re-read it from disk.
+        # Only TXT output is streamed; python-docx and reportlab keep the
+        # whole DOCX/PDF document in memory until it is saved.
+        file_path = write_output_file(store, output_format, element_processor)
+        
+        success_msg = f"✅ Translation completed successfully!\n{total_segments} segments processed."
+        success_msg += "\n(Large-document mode: showing a truncated preview, download the file for the full translation.)"
+        if output_format in ("DOCX", "PDF"):
+            success_msg += (f"\n⚠️ {output_format} output is built in memory and is not covered by the "
+                            f"{LARGE_DOCUMENT_MEMORY_MB:g} MB ceiling; choose TXT for very large documents.")
+        success_msg += element_summary(element_processor)
+        
+        progress(1.0, desc="Complete!")
+        success_msg += f"\n\n{store.preview(PREVIEW_CHARS)}"
+        return success_msg, file_path
+
+def translate_document(file, output_format, large_mode=False, progress=gr.Progress()):
     """Translate uploaded document with table/figure support and complete tracking"""
     if file is None:
         return "Please upload a document first.", None
     
     try:
+        if large_mode or is_large_document(file):
+            return translate_large_document(file, output_format, progress)
+        
         progress(0, desc="Extracting text and elements...")
         text, element_processor = process_document(file)
         
@@ -51,20 +251,9 @@ def translate_document(file, output_format, progress=gr.Progress()):
         # Handle documents with tables/figures (DOCX)
         if element_processor:
             progress(0.1, desc="Processing tables and figures...")
-            
-            # Translate tables if present
-            table_errors = []
-            for table_id in element_processor.tables:
-                success = element_processor.translate_table_cells(table_id, translate_segment)
-                if not success:
-                    table_errors.append(table_id)
-            
-            # Check for element processing errors
-            summary = element_processor.get_processing_summary()
-            if summary['errors']:
-                error_details = "\n".join([f"⚠️ {error}" for error in summary['errors']])
-                if table_errors:
-                    return f"Element processing failed:\n{error_details}", None
+            error_msg = translate_elements(element_processor)
+            if error_msg:
+                return error_msg, None
         
         progress(0.2, desc="Segmenting text...")
         segments, segment_placeholders = segment_text(text)
@@ -79,7 +268,7 @@ def translate_document(file, output_format, progress=gr.Progress()):
         failed_segments = []
         
         # Parallel translation with result tracking
-        with ThreadPoolExecutor(max_workers=64) as executor:
+        with ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS) as executor:
             # Submit all translation tasks
             future_to_index = {executor.submit(translate_segment, segment): i 
                              for i, segment in enumerate(segments)}
@@ -134,36 +323,11 @@ def translate_document(file, output_format, progress=gr.Progress()):
         progress(0.85, desc="Creating download file...")
         
         # Create downloadable file based on format
-        if output_format == "DOCX" and element_processor:
-            # Enhanced DOCX with tables/figures
-            temp_file = tempfile.NamedTemporaryFile(suffix='.docx', delete=False)
-            success = element_processor.reconstruct_docx(translated_text, temp_file.name)
-            if not success:
-                # Fallback to simple DOCX
-                file_path = create_docx_file(translated_text)
-            else:
-                file_path = temp_file.name
-        elif output_format == "TXT":
-            file_path = create_txt_file(translated_text)
-        elif output_format == "DOCX":
-            file_path = create_docx_file(translated_text)
-        elif output_format == "PDF":
-            file_path = create_pdf_file(translated_text)
-        else:
-            file_path = create_txt_file(translated_text)
+        file_path = write_output_file(translated_text, output_format, element_processor)
         
         # Prepare success message with element summary
         success_msg = f"✅ Translation completed successfully!\n{total_segments} segments processed."
-        
-        if element_processor:
-            summary = element_processor.get_processing_summary()
-            if summary['tables']['total'] > 0 or summary['figures']['total'] > 0:
-                success_msg += f"\n\n📄 Elements processed:"
-                success_msg += f"\n• Tables: {summary['tables']['successful']}/{summary['tables']['total']}"
-                success_msg += f"\n• Figures: {summary['figures']['successful']}/{summary['figures']['total']}"
-                
-                if summary['errors']:
-                    success_msg += f"\n\n⚠️ Warnings:\n" + "\n".join([f"• {error}" for error in summary['errors']])
+        success_msg += element_summary(element_processor)
         
         progress(1.0, desc="Complete!")
         success_msg += f"\n\n{translated_text}"
@@ -201,6 +365,10 @@ with gr.Blocks(title="🌍 English to Arabic Translator") as demo:
                         value="TXT",
                         label="Output Format"
                     )
+                    large_mode = gr.Checkbox(
+                        value=False,
+                        label=f"Large document mode (automatic above {LARGE_DOCUMENT_THRESHOLD_MB:g} MB)"
+                    )
                     translate_btn = gr.Button("Translate Document", variant="primary")
                 
                 with gr.Column():
@@ -216,9 +384,23 @@ with gr.Blocks(title="🌍 English to Arabic Translator") as demo:
             
             translate_btn.click(
                 fn=translate_document,
-                inputs=[file_input, output_format],
+                inputs=[file_input, output_format, large_mode],
                 outputs=[output_text, download_file]
             )
 
+# JSON API served next to the Gradio UI, sharing the same batcher
+app = create_api(
+    batcher,
+    request_timeout=API_REQUEST_TIMEOUT,
+    document_timeout=API_DOCUMENT_TIMEOUT,
+    max_text_chars=API_MAX_TEXT_CHARS
+)
+app = gr.mount_gradio_app(app, demo, path="/")
+
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    import uvicorn
+    uvicorn.run(
+        app,
+        host=os.environ.get("GRADIO_SERVER_NAME", "127.0.0.1"),
+        port=int(os.environ.get("GRADIO_SERVER_PORT", "7860"))
+    )
\ No newline at end of file
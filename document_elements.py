@@ -8,6 +8,7 @@ import json
 import uuid
 import tempfile
 import os
+from document_output import iter_paragraphs
 
 class DocumentProcessor:
     def __init__(self):
@@ -131,15 +132,16 @@ class DocumentProcessor:
             return False
     
     def reconstruct_docx(self, translated_text, output_path):
-        """Reconstruct DOCX with translated content and elements"""
+        """Reconstruct DOCX with translated content and elements
+        
+        translated_text may be a string or an iterable of text chunks.
+        """
         try:
             import re
             doc = Document()
             
             # Split by double newlines to preserve paragraph structure
-            paragraphs = translated_text.split('\n\n')
-            
-            for para in paragraphs:
+            for para in iter_paragraphs(translated_text):
                 para = para.strip()
                 if not para:
                     continue
@@ -7,10 +7,23 @@ from reportlab.pdfbase.ttfonts import TTFont
 import os
 import tempfile
 
+def iter_paragraphs(text):
+    """Yield paragraphs from a string or from an iterable of text chunks"""
+    chunks = [text] if isinstance(text, str) else text
+    for chunk in chunks:
+        yield from chunk.split('\n\n')
+
 def create_txt_file(text, filename="translation.txt"):
     """Create a downloadable TXT file"""
     temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8')
-    temp_file.write(text)
+    if isinstance(text, str):
+        temp_file.write(text)
+    else:
+        # Stream chunks straight to disk instead of joining them in memory
+        for i, chunk in enumerate(text):
+            if i:
+                temp_file.write('\n\n')
+            temp_file.write(chunk)
     temp_file.close()
     return temp_file.name
 
@@ -19,8 +32,7 @@ def create_docx_file(text, filename="translation.docx"):
     doc = Document()
     
     # Split text into paragraphs
-    paragraphs = text.split('\n\n')
-    for paragraph in paragraphs:
+    for paragraph in iter_paragraphs(text):
         if paragraph.strip():
             doc.add_paragraph(paragraph.strip())
     
@@ -41,12 +53,19 @@ def create_pdf_file(text, filename="translation.pdf"):
     margin = 50
     line_height = 20
     
-    # Split text into lines that fit the page width
-    lines = []
-    paragraphs = text.split('\n\n')
+    def draw_line(line):
+        nonlocal y_position
+        if y_position < margin:
+            c.showPage()
+            y_position = height - 50
+        
+        c.drawString(margin, y_position, line)
+        y_position -= line_height
     
-    for paragraph in paragraphs:
+    # Split text into lines that fit the page width and draw them as we go
+    for paragraph in iter_paragraphs(text):
         if paragraph.strip():
+            lines = []
             # Simple line wrapping (basic implementation)
             words = paragraph.split()
             current_line = ""
@@ -63,15 +82,9 @@ def create_pdf_file(text, filename="translation.pdf"):
             if current_line:
                 lines.append(current_line)
             lines.append("")  # Empty line between paragraphs
-    
-    # Write lines to PDF
-    for line in lines:
-        if y_position < margin:
-            c.showPage()
-            y_position = height - 50
-        
-        c.drawString(margin, y_position, line)
-        y_position -= line_height
+            
+            for line in lines:
+                draw_line(line)
     
     c.save()
     temp_file.close()
@@ -1,6 +1,7 @@
 import PyPDF2
 from docx import Document
 import nltk
+import re
 from io import BytesIO
 
 # Download required NLTK data
@@ -34,33 +35,40 @@ def extract_text_from_txt(file_bytes):
     """Extract text from TXT file"""
     return file_bytes.decode('utf-8')
 
+def split_sentences(text):
+    """Split text into sentences, falling back to simple splitting without NLTK data"""
+    try:
+        return nltk.sent_tokenize(text)
+    except LookupError:
+        sentences = text.split('. ')
+        return [s + '.' for s in sentences[:-1]] + [sentences[-1]]
+
+PLACEHOLDER_PATTERN = r'\[(TABLE_\d{3}|FIGURE_\d{3})\]'
+
+def find_placeholders(text, end=None):
+    """Find table/figure placeholders and their positions in text[:end]"""
+    matches = re.compile(PLACEHOLDER_PATTERN).finditer(text, 0, len(text) if end is None else end)
+    return [{
+        'id': match.group(0),
+        'start': match.start(),
+        'end': match.end()
+    } for match in matches]
+
 def segment_text(text, max_chars=400):
     """Split text into segments for translation, preserving placeholders"""
-    import re
-    
     # Extract placeholders and their positions
-    placeholder_pattern = r'\[(TABLE_\d{3}|FIGURE_\d{3})\]'
-    placeholders = []
-    
-    # Find all placeholders with their positions
-    for match in re.finditer(placeholder_pattern, text):
-        placeholders.append({
-            'id': match.group(0),
-            'start': match.start(),
-            'end': match.end()
-        })
+    placeholders = find_placeholders(text)
     
     # Remove placeholders from text for translation
-    clean_text = re.sub(placeholder_pattern, '', text)
+    clean_text = re.sub(PLACEHOLDER_PATTERN, '', text)
     
     # Segment the clean text
-    try:
-        sentences = nltk.sent_tokenize(clean_text)
-    except LookupError:
-        # Fallback to simple splitting if NLTK fails
-        sentences = clean_text.split('. ')
-        sentences = [s + '.' for s in sentences[:-1]] + [sentences[-1]]
-    
+    sentences = split_sentences(clean_text)
+    del clean_text
+    return segment_sentences(sentences, placeholders, max_chars)
+
+def segment_sentences(sentences, placeholders, max_chars=400):
+    """Pack sentences into segments of at most max_chars and map placeholders to them"""
     segments = []
     current_segment = ""
     
@@ -123,6 +131,92 @@ def process_document(file):
     else:
         raise ValueError(f"Unsupported file format: {file_extension}")
 
+def segment_text_stream(chunks, max_chars=400, max_carry_chars=40_000):
+    """Segment a stream of text chunks without splitting sentences at chunk edges
+    
+    Yields (segments, segment_placeholders) per chunk like segment_text. The
+    last sentence of each chunk may be incomplete, so it is carried over into
+    the next chunk; a carry longer than max_carry_chars (a run of text with no
+    sentence break) is segmented as-is to keep memory bounded.
+    """
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        del chunk
+        # Tokenize once: every sentence but the last is segmented now, and
+        # the last is carried over as raw text
+        sentences = split_sentences(text)
+        split = text.rfind(sentences[-1]) if sentences and sentences[-1] else len(text)
+        if split <= 0 and len(text) <= max_carry_chars:
+            carry = text
+            continue
+        if split <= 0:
+            # No sentence break within max_carry_chars; segment it as-is
+            split = len(text)
+        else:
+            sentences.pop()
+        placeholders = find_placeholders(text, split)
+        carry = text[split:]
+        del text
+        sentences = [re.sub(PLACEHOLDER_PATTERN, '', sentence) for sentence in sentences]
+        yield segment_sentences([s for s in sentences if s.strip()], placeholders, max_chars)
+    if carry.strip():
+        yield segment_text(carry, max_chars=max_chars)
+
+def _iter_text_chunks(text, chunk_chars):
+    """Split already-extracted text into chunks of at most chunk_chars"""
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars]
+
+def _iter_txt_chunks(file_path, chunk_chars):
+    """Read a TXT file in chunks of at most chunk_chars"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while block := f.read(chunk_chars):
+            yield block
+
+def _iter_pdf_chunks(file_path, chunk_chars):
+    """Extract PDF text page by page, regrouped into chunks of at most chunk_chars"""
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        buffer = ""
+        for page in pdf_reader.pages:
+            buffer += page.extract_text() + "\n"
+            while len(buffer) >= chunk_chars:
+                yield buffer[:chunk_chars]
+                buffer = buffer[chunk_chars:]
+        if buffer:
+            yield buffer
+
+def process_document_stream(file, chunk_chars=1_000_000):
+    """Process uploaded document lazily, yielding text in bounded chunks
+    
+    Returns (chunks, element_processor) like process_document, where chunks
+    is an iterator of strings of at most chunk_chars characters each. Chunks
+    may end mid-sentence, so segment them with segment_text_stream.
+    """
+    if hasattr(file, 'name'):
+        file_path = file.name
+    else:
+        file_path = file
+    
+    file_extension = file_path.lower().split('.')[-1]
+    
+    if file_extension == 'pdf':
+        return _iter_pdf_chunks(file_path, chunk_chars), None
+    elif file_extension == 'docx':
+        # python-docx loads the whole document into memory, so the memory
+        # ceiling does not apply here; only the extracted text is chunked
+        from document_elements import DocumentProcessor
+        processor = DocumentProcessor()
+        text = processor.extract_docx_elements(file_path)
+        if text is None:
+            return None, processor
+        return _iter_text_chunks(text, chunk_chars), processor
+    elif file_extension == 'txt':
+        return _iter_txt_chunks(file_path, chunk_chars), None
+    else:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
 def process_document_simple(file):
     """Simple document processing (backward compatibility)"""
     text, _ = process_document(file)
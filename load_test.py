@@ -0,0 +1,92 @@
+"""Local load test for the JSON translation API.
+
+Fires concurrent requests at a running server and reports QPS and latency
+percentiles, e.g.:
+
+    python app.py
+    python load_test.py --concurrency 32 --requests 500
+    python load_test.py --endpoint batch --batch-size 16
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+
+SAMPLE_TEXTS = [
+    "Hello, how are you?",
+    "I love learning new languages.",
+    "Technology is changing the world.",
+    "Welcome to our website.",
+    "The meeting has been moved to next Tuesday afternoon.",
+    "Please read the attached report before the review.",
+    "Our team is working on improving translation quality.",
+    "The weather today is sunny with a light breeze.",
+]
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a sorted list"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+async def run(args):
+    if args.endpoint == "batch":
+        url = f"{args.url}/api/translate/batch"
+    else:
+        url = f"{args.url}/api/translate"
+
+    def payload(i):
+        if args.unique:
+            # Defeat the translation cache to measure model throughput
+            suffix = f" ({i})"
+        else:
+            suffix = ""
+        if args.endpoint == "batch":
+            return {"texts": [random.choice(SAMPLE_TEXTS) + suffix for _ in range(args.batch_size)]}
+        return {"text": random.choice(SAMPLE_TEXTS) + suffix}
+
+    latencies = []
+    errors = 0
+    counter = iter(range(args.requests))
+
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=payload(i))
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    completed = len(latencies)
+    texts_per_request = args.batch_size if args.endpoint == "batch" else 1
+    print(f"Requests:    {completed} ok, {errors} failed in {elapsed:.2f}s")
+    print(f"QPS:         {completed / elapsed:.1f} requests/s ({completed * texts_per_request / elapsed:.1f} texts/s)")
+    for pct in (50, 90, 95, 99):
+        print(f"p{pct}:".ljust(13) + f"{percentile(latencies, pct) * 1000:.1f} ms")
+    if latencies:
+        print(f"max:         {latencies[-1] * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the translation API")
+    parser.add_argument("--url", default="http://127.0.0.1:7860", help="Server base URL")
+    parser.add_argument("--endpoint", choices=["single", "batch"], default="single")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--batch-size", type=int, default=8, help="Texts per batch request")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout in seconds")
+    parser.add_argument("--unique", action="store_true", help="Make every text unique to bypass the cache")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+
+class SegmentStore:
+    """Append-only on-disk storage for source segments and their translations.
+
+    Segments are written once during extraction and read back lazily while
+    translating, and translations are appended in segment order so output
+    writers can stream them without holding the document in memory.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = tempfile.mkdtemp(prefix="segments_", dir=directory)
+        self._source_path = os.path.join(self.directory, "source.jsonl")
+        self._translation_path = os.path.join(self.directory, "translation.jsonl")
+        self._source_file = open(self._source_path, 'a', encoding='utf-8')
+        self._translation_file = open(self._translation_path, 'a', encoding='utf-8')
+        self.segment_count = 0
+        self.translation_count = 0
+        self.failed_segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append_segment(self, text, placeholders=()):
+        """Store a source segment with the placeholders that follow it"""
+        record = {'text': text, 'placeholders': list(placeholders)}
+        self._source_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.segment_count += 1
+        return self.segment_count - 1
+
+    def iter_segments(self):
+        """Yield (index, text, placeholders) for every stored source segment"""
+        self._source_file.flush()
+        with open(self._source_path, 'r', encoding='utf-8') as f:
+            for index, line in enumerate(f):
+                record = json.loads(line)
+                yield index, record['text'], record['placeholders']
+
+    def append_translation(self, index, text, placeholders=(), failed=False):
+        """Store the translation of the next segment; must be called in order"""
+        if index != self.translation_count:
+            raise ValueError(f"Expected translation for segment {self.translation_count}, got {index}")
+        if failed:
+            self.failed_segments.append(index + 1)
+        record = {'text': text, 'placeholders': list(placeholders)}
+        self._translation_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.translation_count += 1
+
+    def iter_output(self):
+        """Yield translated segments followed by their placeholders, in order"""
+        self._translation_file.flush()
+        with open(self._translation_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                yield record['text']
+                yield from record['placeholders']
+
+    def __iter__(self):
+        """Iterate over the translated output; each call re-reads it from disk"""
+        return self.iter_output()
+
+    def preview(self, max_chars=5000):
+        """Return the start of the translated output, truncated to max_chars"""
+        parts = []
+        length = 0
+        for part in self.iter_output():
+            if parts:
+                length += 2
+            if length + len(part) > max_chars:
+                if max_chars > length:
+                    parts.append(part[:max_chars - length])
+                return "\n\n".join(parts) + "\n\n[... preview truncated ...]"
+            parts.append(part)
+            length += len(part)
+        return "\n\n".join(parts)
+
+    def close(self):
+        """Close the backing files and remove them from disk"""
+        for f in (self._source_file, self._translation_file):
+            if not f.closed:
+                f.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
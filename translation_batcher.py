@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+class QueueFullError(Exception):
+    """Raised by a non-blocking submit when the batcher queue is full"""
+
+class TranslationBatcher:
+    """Group concurrent translation requests into model batches with an LRU cache.
+
+    Callers from any thread submit single segments and get a Future back; a
+    background worker drains the queue into batches of up to max_batch_size,
+    waiting at most max_wait_ms for a batch to fill. asyncio callers can await
+    the Future with asyncio.wrap_future, and should call abandon() for texts
+    they stop waiting for so those are dropped before reaching the model.
+    """
+
+    def __init__(self, translate_batch, max_batch_size=32, max_wait_ms=10, cache_size=10000,
+                 max_queue_size=1024):
+        self.translate_batch = translate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # Futures for texts already queued or being translated, so duplicate
+        # concurrent requests share one model call, and how many callers are
+        # still waiting on each
+        self._inflight = {}
+        self._waiters = {}
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = threading.Thread(target=self._run, name="translation-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text, block=True):
+        """Queue a segment for translation and return a Future for the result
+
+        With block=False, raises QueueFullError instead of waiting for room.
+        """
+        with self._lock:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                future = Future()
+                future.set_result(self._cache[text])
+                return future
+            if text in self._inflight:
+                self._waiters[text] += 1
+                return self._inflight[text]
+            future = Future()
+            # Mark as running so a caller's cancellation (e.g. an asyncio
+            # timeout) cannot cancel a future that other callers share
+            future.set_running_or_notify_cancel()
+            self._inflight[text] = future
+            self._waiters[text] = 1
+
+        try:
+            self._queue.put(text, block=block)
+        except queue.Full:
+            with self._lock:
+                self._inflight.pop(text, None)
+                self._waiters.pop(text, None)
+            # Callers that joined in the meantime share the failure
+            future.set_exception(QueueFullError("Translation queue is full"))
+            raise QueueFullError("Translation queue is full")
+        return future
+
+    def abandon(self, text):
+        """Stop waiting for a submitted text; it is skipped if no one else waits"""
+        with self._lock:
+            if text in self._waiters and self._waiters[text] > 0:
+                self._waiters[text] -= 1
+
+    def translate(self, text):
+        """Translate a single segment, blocking until its batch completes"""
+        return self.submit(text).result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _translate(self, texts):
+        """Run translate_batch, turning any failure into per-text error strings"""
+        try:
+            results = self.translate_batch(texts)
+            if not isinstance(results, list) or len(results) != len(texts):
+                raise ValueError(f"translate_batch returned {type(results).__name__} "
+                                 f"for a batch of {len(texts)} texts")
+            return [result if isinstance(result, str) else f"Error: invalid result {result!r}"
+                    for result in results]
+        except Exception as e:
+            return [f"Error: {str(e)}"] * len(texts)
+
+    def _resolve(self, texts, results, cache):
+        """Pop the futures for texts and set their results"""
+        with self._lock:
+            futures = []
+            for text, result in zip(texts, results):
+                futures.append(self._inflight.pop(text, None))
+                self._waiters.pop(text, None)
+                # Never cache failures so they can be retried
+                if cache and self.cache_size and not result.startswith("Error:"):
+                    self._cache[text] = result
+                    self._cache.move_to_end(text)
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        for future, result in zip(futures, results):
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            live = []
+            abandoned = []
+            try:
+                # Pop abandoned texts under the same lock that picks the live
+                # ones, so a concurrent submit starts a fresh future instead of
+                # joining one that is about to be failed
+                with self._lock:
+                    for text in batch:
+                        if self._waiters.get(text, 0) > 0:
+                            live.append(text)
+                        else:
+                            abandoned.append(self._inflight.pop(text, None))
+                            self._waiters.pop(text, None)
+                for future in abandoned:
+                    if future is not None and not future.done():
+                        future.set_result("Error: abandoned by all callers")
+                if live:
+                    self._resolve(live, self._translate(live), cache=True)
+            except Exception as e:
+                # Never let the worker die with callers still waiting; abandoned
+                # texts were already popped and may have been resubmitted since
+                unresolved = live + batch[len(live) + len(abandoned):]
+                self._resolve(unresolved, [f"Error: {str(e)}"] * len(unresolved), cache=False)